@@ -1,5 +1,8 @@
 import typing
 
+from functools import partial
+from inspect import isawaitable
+
 from .. import models as sync_models
 
 
@@ -11,22 +14,27 @@ __all__ = (
 
 
 _instance_error = sync_models._instance_error  # noqa
+_append_check = sync_models._append_check  # noqa
+_to_response = sync_models._to_response  # noqa
 
 
 # just for type-hinting
-_C_req = typing.Callable[["APIRequest"], typing.Awaitable[bool]]
-_C_res = typing.Callable[["APIResponse"], typing.Awaitable[typing.NoReturn]]
+_C_req = typing.Callable[["APIRequest"], typing.Union[bool, typing.Awaitable[bool]]]
+_C_res = typing.Callable[["APIResponse"], typing.Optional[typing.Awaitable[None]]]
 _TC_req = typing.TypeVar("_TC_req", bound=_C_req)
 _TC_res = typing.TypeVar("_TC_res", bound=_C_res)
 
 
 class Node(sync_models.Node):
+    __slots__ = ()
+
     _clb: typing.Callable[[...], typing.Coroutine]
     _parent: "Node"
 
     _checks_request: list[tuple[_C_req, int]]
     _checks_response: list[_C_res]
-    _children: dict[str, "Node"]
+    _children: typing.Optional[dict[str, "Node"]]
+    _routes: dict[str, "Node"]
 
     def add_request_check(
         self,
@@ -44,21 +52,7 @@ class Node(sync_models.Node):
         -------
         typing.Callable[[_TC_req], _TC_req]
         """
-
-        def decorator(clb: _TC_req) -> _TC_req:
-            """
-            Parameters
-            ----------
-            clb: _TC_req
-
-            Returns
-            -------
-            _TC_req
-            """
-            self._checks_request.append((clb, default_return_value))
-            return clb
-
-        return decorator
+        return partial(_append_check, self._checks_request, (default_return_value,))
 
     def add_response_check(self) -> typing.Callable[[_TC_res], _TC_res]:
         """
@@ -68,21 +62,7 @@ class Node(sync_models.Node):
         -------
         typing.Callable[[_TC_res], _TC_res]
         """
-
-        def decorator(clb: _TC_res) -> _TC_res:
-            """
-            Parameters
-            ----------
-            clb: _TC_res
-
-            Returns
-            -------
-            _TC_res
-            """
-            self._checks_response.append(clb)
-            return clb
-
-        return decorator
+        return partial(_append_check, self._checks_response, None)
 
     async def run(
         self,
@@ -98,14 +78,17 @@ class Node(sync_models.Node):
         APIResponse
         """
         if request.method not in self._methods:
-            return APIResponse(405)
+            return APIResponse.status(405)
 
+        # checks which don't return an awaitable don't need a trip through the loop
         for check, default in self._checks_request:
-            if not await check(request):
-                return APIResponse(default)
+            if isawaitable(ok := check(request)):
+                ok = await ok
+            if not ok:
+                return APIResponse.status(default)
 
         result = await self._clb(request)
-        auu = (None, {})
+        auu = None
 
         # format from return from
         # AlbertUnruhUtils.asynchronous.ratelimit.server.ServerRateLimit.__call__.decorator()
@@ -113,33 +96,34 @@ class Node(sync_models.Node):
         # -----
         # - decorator is in this case nested and not direct accessible
         # - library: https://github.com/AlbertUnruh/AlbertUnruhUtils.py
-        if "AlbertUnruhUtils" in self._used_libs:
+        if self._uses_auu:
             auu, result = result
             if not auu[0]:
                 result = 429
 
         if isinstance(result, tuple):
-            result = APIResponse(*result)
+            result = _to_response(*result)
         else:
-            result = APIResponse(result)
+            result = _to_response(result)
 
-        result._response.update(auu[1])  # noqa
+        if auu is not None and auu[1]:
+            result.response.update(auu[1])
 
-        for check in self._checks_response:
-            await check(result)
+        if self._checks_response:
+            await _run_response_checks(self._checks_response, result)
 
         return result
 
     async def find_node(
         self,
-        path: list[str],
+        path: str,
         request: "APIRequest",
     ) -> "APIResponse":
         """
         Parameters
         ----------
-        path: list[str]
-            The path to the next node.
+        path: str
+            The path to the node, e.g. ``"users/list"``.
         request: APIRequest
 
         Returns
@@ -150,13 +134,25 @@ class Node(sync_models.Node):
             kwarg="request", expected="APIRequest", received=request
         )
 
-        if path[0] in self._children:
-            if len(path) == 1:
-                return await self._children[path[0]].run(request)
-            else:
-                return await self._children[path[0]].find_node(path[1:], request)
-        else:
-            return APIResponse(404)
+        node = self._resolve(path)
+        if node is None:
+            return APIResponse.status(404)
+        return await node.run(request)
+
+
+async def _run_response_checks(checks, response):
+    """
+    Runs the response checks one after another in the order they were added,
+    awaitables are awaited before the next check runs.
+
+    Parameters
+    ----------
+    checks: list[_C_res]
+    response: APIResponse
+    """
+    for check in checks:
+        if isawaitable(res := check(response)):
+            await res
 
 
 # not in a class definition since nothing changes
@@ -1,13 +1,29 @@
 import asyncio
+import os
 import typing
 
+from functools import partial
+from inspect import isawaitable
+from threading import Lock, Thread
 from werkzeug.serving import run_simple
-from werkzeug.wrappers import Request, Response
-from json import dumps
 
 from .models import Node, APIRequest, APIResponse
+from .models import _append_check, _run_response_checks  # noqa
 from .. import web as sync_web
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+# Python 3.12+
+_eager_task_factory = getattr(asyncio, "eager_task_factory", None)
+
 
 __all__ = (
     "API",
@@ -18,11 +34,16 @@ __all__ = (
 
 HTTP_METHODS = sync_web.HTTP_METHODS
 ALLOWED_LIBS = sync_web.ALLOWED_LIBS
+_pre_dumps = sync_web._pre_dumps  # noqa
+_wsgi_request = sync_web._wsgi_request  # noqa
+_wsgi_send = sync_web._wsgi_send  # noqa
+_asgi_request = sync_web._asgi_request  # noqa
+_asgi_send = sync_web._asgi_send  # noqa
 
 
 # just for type-hinting
-_C_req = typing.Callable[["APIRequest"], typing.Awaitable[bool]]
-_C_res = typing.Callable[["APIResponse"], typing.Awaitable[typing.NoReturn]]
+_C_req = typing.Callable[["APIRequest"], typing.Union[bool, typing.Awaitable[bool]]]
+_C_res = typing.Callable[["APIResponse"], typing.Optional[typing.Awaitable[None]]]
 _TC_req = typing.TypeVar("_TC_req", bound=_C_req)
 _TC_res = typing.TypeVar("_TC_res", bound=_C_res)
 
@@ -32,61 +53,126 @@ async def _default_endpoint(*_):
 
 
 class API(sync_web.API):
-    _checks_request_global: dict[str, list[tuple[_C_req, int]]]
+    _checks_request_global: dict[str, list[tuple[_C_req, int, bytes]]]
     _checks_response_global: dict[str, list[_C_res]]
     _versions: dict[str, Node]
+    _node_cls = Node
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._default_endpoint = _default_endpoint
+        self._loop = None  # type: typing.Optional[asyncio.AbstractEventLoop]
+        self._loop_pid = None
+        self._loop_lock = Lock()
 
-    @Request.application
-    def _application(self, request):
+    def _application(self, environ, start_response):
         """
+        The API as WSGI application.
+
         Parameters
         ----------
-        request: Request
+        environ: dict
+        start_response: typing.Callable
+
+        Returns
+        -------
+        list[bytes]
         """
-        return asyncio.run(self._application_async(request))
+        future = asyncio.run_coroutine_threadsafe(
+            self._route(**_wsgi_request(environ)), self._get_loop()
+        )
+        status, body = future.result()
+        return _wsgi_send(start_response, status, body, environ["REQUEST_METHOD"])
 
-    async def _application_async(self, request):
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
         """
+        Returns the event loop of the current process.
+
+        Returns
+        -------
+        asyncio.AbstractEventLoop
+
+        Notes
+        -----
+        The loop runs forever in a background thread and is reused by every
+        request. It's started lazily and per process, because forked
+        processes (``processes > 1``) don't inherit the thread of the loop.
+        Where available (Python 3.12+) tasks are started eagerly, so coroutines
+        which finish without suspending never get scheduled on the loop.
+        """
+        if self._loop_pid != (pid := os.getpid()):
+            with self._loop_lock:
+                if self._loop_pid != pid:
+                    if uvloop is not None:
+                        loop = uvloop.new_event_loop()
+                    else:
+                        loop = asyncio.new_event_loop()
+                    if _eager_task_factory is not None:
+                        loop.set_task_factory(_eager_task_factory)
+                    Thread(
+                        target=loop.run_forever, name="NAA-event-loop", daemon=True
+                    ).start()
+                    self._loop, self._loop_pid = loop, pid
+        return self._loop
+
+    def _stop_loop(self):
+        if self._loop is not None and self._loop_pid == os.getpid():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = self._loop_pid = None
+
+    async def _asgi(self, scope, receive, send):
+        """
+        The API as ASGI application, it's served by ``run_api`` if uvicorn
+        is installed.
+
         Parameters
         ----------
-        request: Request
+        scope: dict
+        receive, send: typing.Callable
+        """
+        if scope["type"] != "http":
+            return
+
+        status, body = await self._route(**_asgi_request(scope))
+        await _asgi_send(send, status, body)
+
+    async def _route(self, method, path, headers, ip):
+        """
+        Parameters
+        ----------
+        method, path: str
+        headers: typing.Mapping[str, str]
+        ip: str, optional
 
         Returns
         -------
-        Response
+        tuple[int, bytes]
+            The status code and the body of the response.
         """
-        path = request.path[1:]
-
-        version = self._version_default
-        p = path.split("/")
-        if p:
-            for v in self._versions:
-                if v == p[0]:
-                    version = v
-                    # to get rid of the version in path
-                    path = path[len(v) + 1 :]  # noqa: E203
-                    break
-        del p
+        path = path[1:]
+
+        first, _, rest = path.partition("/")
+        if (ctx := self._by_version.get(first)) is not None:
+            version = first
+            # to get rid of the version in path
+            path = rest
+        else:
+            version = self._version_default
+            ctx = self._by_version[version]
 
         request = APIRequest(
-            method=request.method,
-            headers=dict(request.headers),
-            ip=request.remote_addr,
+            method=method,
+            headers=headers,
+            ip=ip,
             url=path,
             version=version,
         )
 
-        for check, status in self._checks_request_global.get(version):
-            if not await check(request):
-                return Response(
-                    status=status,
-                    response=dumps({"message": APIResponse.DEFAULT_MESSAGES[status]}),
-                    content_type="application/json",
-                )
+        for check, status, body in ctx.req_checks:
+            if isawaitable(ok := check(request)):
+                ok = await ok
+            if not ok:
+                return status, body
 
         if not path:
             result = await self._default_endpoint(request)
@@ -97,30 +183,25 @@ class API(sync_web.API):
             # -----
             # - decorator is in this case nested and not direct accessible
             # - library: https://github.com/AlbertUnruh/AlbertUnruhUtils.py
-            if "AlbertUnruhUtils" in self._used_libs:
+            if self._uses_auu:
                 auu, result = result
                 if not auu[0]:
                     result = APIResponse(429)
-                result._response.update(auu[1])  # noqa
+                if auu[1]:
+                    result.response.update(auu[1])
 
         else:
-            path = path.split("/")
-            result = await self._versions[version].find_node(
+            result = await ctx.root.find_node(
                 path=path, request=request
             )  # type: APIResponse
 
-        for check in self._checks_response_global.get(version):
-            check(result)
-
-        status = result.status_code
+        checks = ctx.resp_checks
+        if checks:
+            # the shared responses mustn't be modified by the checks
+            result = result.copy_if_shared()
+            await _run_response_checks(checks, result)
 
-        response = result.response
-        response.update(message=result.message)
-        response = dumps(response)
-
-        return Response(
-            status=status, response=response, content_type="application/json"
-        )
+        return result.status_code, result.to_json_bytes()
 
     def add_global_request_check(
         self, default_return_value
@@ -137,22 +218,12 @@ class API(sync_web.API):
         -------
         typing.Callable[[_TC_req], _TC_req]
         """
-
-        def decorator(clb: _TC_req) -> _TC_req:
-            """
-            Parameters
-            ----------
-            clb: _TC_req
-
-            Returns
-            -------
-            _TC_req
-            """
-            version = self._get_version()
-            self._checks_request_global[version].append((clb, default_return_value))
-            return clb
-
-        return decorator
+        version = self._get_version()
+        return partial(
+            _append_check,
+            self._checks_request_global[version],
+            (default_return_value, _pre_dumps(default_return_value)),
+        )
 
     def add_global_response_check(
         self,
@@ -164,22 +235,8 @@ class API(sync_web.API):
         -------
         typing.Callable[[_TC_res], _TC_res]
         """
-
-        def decorator(clb: _TC_res) -> _TC_res:
-            """
-            Parameters
-            ----------
-            clb: _TC_res
-
-            Returns
-            -------
-            _TC_res
-            """
-            version = self._get_version()
-            self._checks_response_global[version].append(clb)
-            return clb
-
-        return decorator
+        version = self._get_version()
+        return partial(_append_check, self._checks_response_global[version], None)
 
     def default_endpoint(
         self,
@@ -224,6 +281,7 @@ class API(sync_web.API):
         debug: bool = False,
         reload: bool = False,
         processes: int = 1,
+        use_werkzeug: bool = False,
     ):
         """
         Parameters
@@ -232,20 +290,48 @@ class API(sync_web.API):
             Whether it should debug/reload.
         processes: int
             The number of processes which can be used by the server.
+        use_werkzeug: bool
+            Whether werkzeug's development server should be used even
+            if uvicorn is installed.
+
+        Notes
+        -----
+        The API is served by uvicorn (ASGI) in the running event loop if it's
+        installed. werkzeug's ``run_simple`` (WSGI) is used instead if uvicorn
+        isn't installed, ``use_werkzeug`` is set or one of ``debug``, ``reload``
+        and ``processes > 1`` is requested. ``run_simple`` handles the requests
+        in threads (or in ``processes`` processes).
+
+        werkzeug's server is only meant for development, in production
+        ``API.wsgi`` should be served by a WSGI server like gunicorn or waitress
+        or ``API.asgi`` by an ASGI server like uvicorn with several workers.
         """
-        if self._versions and (default := self._version_default) is not None:
-            if default not in self._versions:
-                raise RuntimeError(
-                    f"Can't have {default!r} as default version, because this version is not set!"
-                )
-        run_simple(
-            self.host,
-            self.port,
-            self._application,
-            use_reloader=reload,
-            use_debugger=debug,
-            processes=processes,
-        )
+        self._finalize()
+        if uvicorn is not None and not (
+            use_werkzeug or debug or reload or processes > 1
+        ):
+            config = uvicorn.Config(
+                self._asgi,
+                host=self.host,
+                port=self.port,
+                interface="asgi3",
+                lifespan="off",
+            )
+            await uvicorn.Server(config).serve()
+            return
+
+        try:
+            run_simple(
+                self.host,
+                self.port,
+                self._application,
+                use_reloader=reload,
+                use_debugger=debug,
+                processes=processes,
+                threaded=processes == 1,
+            )
+        finally:
+            self._stop_loop()
 
     __call__ = run_api
 
@@ -1,19 +1,114 @@
+import typing
+
+from functools import lru_cache, partial
+from json import dumps
+from types import MappingProxyType
 from warnings import warn
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 __all__ = ("Node", "APIResponse", "APIRequest")
 
+
+HTTP_METHODS = (
+    "GET",
+    "HEAD",
+    "POST",
+    "PUT",
+    "DELETE",
+    "CONNECT",
+    "OPTIONS",
+    "TRACE",
+    "PATCH",
+)
+_HTTP_METHODS_SET = frozenset(HTTP_METHODS)
+
 _instance_error = (
     "'{kwarg}' must be an instance of {expected}, not {received.__class__.__name__!r}"
 )
 
+# bumped whenever a node gets a new child, compiled routes are rebuilt on mismatch
+_routes_generation = 0
+
+
+def _append_check(store, extra, clb):
+    """
+    Parameters
+    ----------
+    store: list
+        Where the check is stored.
+    extra: tuple, optional
+        Stored together with the check.
+    clb: callable
+        The check.
+
+    Returns
+    -------
+    callable
+        The unchanged check.
+    """
+    store.append(clb if extra is None else (clb, *extra))
+    return clb
+
+
+def _dumps(obj):
+    """
+    Parameters
+    ----------
+    obj: dict
+
+    Returns
+    -------
+    bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str)
+        except TypeError:
+            # e.g. non-string keys or integers which don't fit into 64 bits
+            pass
+    return dumps(obj, default=str, separators=(",", ":")).encode()
+
+
+@lru_cache(maxsize=256)
+def _message_body(message):
+    """
+    Parameters
+    ----------
+    message: str
+
+    Returns
+    -------
+    bytes
+        The body of a response which only carries its message,
+        it's serialized once per message.
+    """
+    return _dumps({"message": message})
+
 
 class Node:
-    _clb = None  # type: callable
-    _parent = None  # type: Node
+    __slots__ = (
+        "_clb",
+        "_parent",
+        "_path",
+        "_must_warn",
+        "_methods",
+        "_checks_request",
+        "_checks_response",
+        "_children",
+        "_routes",
+        "_routes_generation",
+        "_used_libs",
+        "_uses_auu",
+    )
 
     _checks_request: list[tuple[callable, int]]
     _checks_response: list[callable]
-    _children: dict[str, "Node"]
+    _children: typing.Optional[dict[str, "Node"]]
+    _routes: dict[str, "Node"]
 
     def __init__(self, *methods, ignore_invalid_methods=False, used_libs=None):
         """
@@ -23,19 +118,22 @@ class Node:
         ignore_invalid_methods: bool,
         used_libs: list[str], optional
         """
-        from .web import HTTP_METHODS
-
-        u = str.upper
-
-        methods = [u(m) for m in methods if u(m) in HTTP_METHODS]
+        methods = frozenset(map(str.upper, methods)) & _HTTP_METHODS_SET
 
+        self._clb = None  # type: callable
+        self._parent = None  # type: Node
+        self._path = None  # type: str
         self._must_warn = not methods and not ignore_invalid_methods
         self._methods = methods
         self._checks_request = []
         self._checks_response = []
-        self._children = {}
+        # most nodes are leaves, so the dictionary is created with the first child
+        self._children = None
+        self._routes = {}
+        self._routes_generation = -1
 
         self._used_libs = used_libs or []
+        self._uses_auu = "AlbertUnruhUtils" in self._used_libs
 
     def __call__(self, clb):
         """
@@ -45,8 +143,13 @@ class Node:
             The function/method which should be a node.
         """
         self._clb = clb
+        # the parent is already known here, so the path doesn't change anymore
+        if self._parent is not None:
+            self._path = self._parent._path + "/" + clb.__name__
+        else:
+            self._path = "/" + clb.__name__
         if self._must_warn:
-            valid = ", ".join(__import__(f"{__package__}.web").HTTP_METHODS)
+            valid = ", ".join(HTTP_METHODS)
             warn(
                 RuntimeWarning(
                     f"You haven't set any (valid) methods for {self.path}! Valid methods are {valid}."
@@ -74,13 +177,13 @@ class Node:
             Node
                 The new node.
             """
-            node = Node(
+            node = self.__class__(
                 *methods,
                 ignore_invalid_methods=ignore_invalid_methods,
                 used_libs=self._used_libs,
             )
             node._parent = self
-            self._children[clb.__name__] = node
+            self._add_child(clb.__name__, node)
             node(clb)
             return node
 
@@ -95,33 +198,13 @@ class Node:
         ----------
         default_return_value: int
         """
-
-        def decorator(clb):
-            """
-            Parameters
-            ----------
-            clb: callable
-            """
-            self._checks_request.append((clb, default_return_value))
-            return clb
-
-        return decorator
+        return partial(_append_check, self._checks_request, (default_return_value,))
 
     def add_response_check(self):
         """
         Can be used to edit responses before sending them.
         """
-
-        def decorator(clb):
-            """
-            Parameters
-            ----------
-            clb: callable
-            """
-            self._checks_response.append(clb)
-            return clb
-
-        return decorator
+        return partial(_append_check, self._checks_response, None)
 
     def run(self, request):
         """
@@ -134,14 +217,14 @@ class Node:
         APIResponse
         """
         if request.method not in self._methods:
-            return APIResponse(405)
+            return APIResponse.status(405)
 
         for check, default in self._checks_request:
             if not check(request):
-                return APIResponse(default)
+                return APIResponse.status(default)
 
         result = self._clb(request)
-        auu = (None, {})
+        auu = None
 
         # format from return from
         # AlbertUnruhUtils.ratelimit.server.ServerRateLimit.__call__.decorator()
@@ -149,17 +232,18 @@ class Node:
         # -----
         # - decorator is in this case nested and not direct accessible
         # - library: https://github.com/AlbertUnruh/AlbertUnruhUtils.py
-        if "AlbertUnruhUtils" in self._used_libs:
+        if self._uses_auu:
             auu, result = result
             if not auu[0]:
                 result = 429
 
         if isinstance(result, tuple):
-            result = APIResponse(*result)
+            result = _to_response(*result)
         else:
-            result = APIResponse(result)
+            result = _to_response(result)
 
-        result._response.update(auu[1])  # noqa
+        if auu is not None and auu[1]:
+            result.response.update(auu[1])
 
         for check in self._checks_response:
             check(result)
@@ -170,8 +254,8 @@ class Node:
         """
         Parameters
         ----------
-        path: list[str]
-            The path to the next node.
+        path: str
+            The path to the node, e.g. ``"users/list"``.
         request: APIRequest
 
         Returns
@@ -182,13 +266,68 @@ class Node:
             kwarg="request", expected="APIRequest", received=request
         )
 
-        if path[0] in self._children:
-            if len(path) == 1:
-                return self._children[path[0]].run(request)
-            else:
-                return self._children[path[0]].find_node(path[1:], request)
-        else:
-            return APIResponse(404)
+        node = self._resolve(path)
+        if node is None:
+            return APIResponse.status(404)
+        return node.run(request)
+
+    def finalize(self):
+        """
+        Compiles the routes of this node and all nodes below it, so the first
+        request doesn't have to (``API.run_api`` does this).
+
+        Notes
+        -----
+        The checks stay lists, checks which are added later are still run.
+        """
+        self._compile_routes()
+
+    def _add_child(self, name, node):
+        """
+        Parameters
+        ----------
+        name: str
+        node: Node
+        """
+        global _routes_generation
+        if self._children is None:
+            self._children = {}
+        self._children[name] = node
+        _routes_generation += 1
+
+    def _compile_routes(self):
+        """
+        Flattens all nodes below this one into ``self._routes``,
+        so a path can be resolved with a single lookup.
+        """
+        # read before walking, so a child added meanwhile triggers another rebuild
+        generation = _routes_generation
+        routes = {}
+        stack = list((self._children or {}).items())
+        while stack:
+            path, node = stack.pop()
+            routes[path] = node
+            if node._children:
+                stack.extend(
+                    (f"{path}/{name}", child) for name, child in node._children.items()
+                )
+        self._routes = routes
+        self._routes_generation = generation
+
+    def _resolve(self, path):
+        """
+        Parameters
+        ----------
+        path: str
+            The path to the node, e.g. ``"users/list"``.
+
+        Returns
+        -------
+        Node, optional
+        """
+        if self._routes_generation != _routes_generation:
+            self._compile_routes()
+        return self._routes.get(path)
 
     @property
     def path(self):
@@ -197,92 +336,62 @@ class Node:
         -------
         str
         """
-        if self._parent is not None:
-            return self._parent.path + "/" + self._clb.__name__
-        return "/" + self._clb.__name__
+        return self._path
 
     def __repr__(self):
         return (
             f"<{self.__class__.__name__}: "
             f"name={self._clb.__name__!r} "
-            f"children={self._children!r}>"
+            f"children={self._children or {}!r}>"
         )
 
 
 class APIRequest:
+    __slots__ = ("method", "_headers", "_headers_dict", "ip", "url", "version")
+
     def __init__(self, method, headers, ip, url, version):
         """
         Parameters
         ----------
         method, ip, url, version: str
-        headers: dict[str, str]
+        headers: Mapping[str, str]
+            Isn't copied, a dictionary is only created if ``headers`` is accessed.
         """
-        self._method = method
+        self.method = method  # type: str
         self._headers = headers
-        self._ip = ip
-        self._url = url
-        self._version = version
-
-    @property
-    def method(self):
-        """
-        Returns
-        -------
-        str
-        """
-        return self._method
-
-    @property
-    def ip(self):
-        """
-        Returns
-        -------
-        str
-        """
-        return self._ip
-
-    @property
-    def url(self):
-        """
-        Returns
-        -------
-        str
-        """
-        return self._url
-
-    @property
-    def version(self):
-        """
-        Returns
-        -------
-        str
-        """
-        return self._version
+        self._headers_dict = None  # type: dict[str, str]
+        self.ip = ip  # type: str
+        self.url = url  # type: str
+        self.version = version  # type: str
 
     @property
     def headers(self):
         """
         Returns
         -------
-
+        dict[str, str]
         """
-        return self._headers
+        if self._headers_dict is None:
+            self._headers_dict = dict(self._headers)
+        return self._headers_dict
 
     def get(self, item, /, default=None):
-        return self.headers.get(item, default)
+        # reads the original headers, so no dictionary has to be created
+        return self._headers.get(item, default)
 
     def __repr__(self):
         return (
             f"<{self.__class__.__name__}: "
-            f"method={self._method!r} "
+            f"method={self.method!r} "
             f"headers={self._headers!r}>"
         )
 
 
 class APIResponse:
-    __dict = type(
-        "dict", (dict,), {"__getitem__": lambda self, item: self.get(item, "")}
-    )
+    __slots__ = ("status_code", "response", "_message")
+
+    # ``__missing__`` is only called for unknown codes, known ones are looked up in C
+    __dict = type("dict", (dict,), {"__missing__": lambda self, item: ""})
     # fmt: off
     DEFAULT_MESSAGES = __dict(
         {  # copied from https://en.wikipedia.ord/wiki/List_of_HTTP_status_codes
@@ -361,72 +470,98 @@ class APIResponse:
         }
     )
     # fmt: on
+    # the messages are titled once here instead of in every ``__init__``
+    _TITLED_MESSAGES = __dict({k: v.title() for k, v in DEFAULT_MESSAGES.items()})
     del __dict
 
+    _POOL = {}  # type: dict[int, APIResponse]
+
     def __init__(self, status_code, response=None, message=None):
         """
         Parameters
         ----------
         status_code: int
-        response: dict[str, str]
+        response: dict[str, str], optional
         message: str, optional
 
         Notes
         -----
-        All parameters are type-checked, which means ``status_code`` can be
-        ``response`` and 'll be ``200`` and if ``response`` is the ``message``
-        it'll also be corrected.
-        This is because the project for which this library originally was coded
-        gets its data for this class by a return and if I want to send
-        ``status_code=201, message="Entry Created"`` I just can return
-        ``201, "Entry Created"`` and don't have to add an empty dictionary
-        to the return.
+        The arguments aren't type-checked anymore, use ``APIResponse.from_dict``
+        if you only have a response.
         """
-        if isinstance(response, str):
-            message, response = response, {}
-
-        if isinstance(status_code, dict):
-            response, status_code = status_code, 200
-
         if response is None:
             response = {}
 
-        assert isinstance(status_code, int), _instance_error.format(
-            kwarg="status_code", expected="int", received=status_code
-        )
-        assert isinstance(response, dict), _instance_error.format(
-            kwarg="response", expected="dict", received=response
-        )
-
         message = response.pop("message", message)
         if message is None:
-            message = self.DEFAULT_MESSAGES[status_code]
+            message = self._TITLED_MESSAGES[status_code]
+        else:
+            message = message.title()
 
-        assert isinstance(message, str), _instance_error.format(
-            kwarg="message", expected="str", received=message
-        )
+        self.status_code = status_code  # type: int
+        self.response = response  # type: dict[str, str]
+        self._message = message
 
-        self._status_code = status_code
-        self._response = response
-        self._message = message.title()
+    @classmethod
+    def from_dict(cls, response, message=None):
+        """
+        Parameters
+        ----------
+        response: dict[str, str]
+        message: str, optional
 
-    @property
-    def status_code(self):
+        Returns
+        -------
+        APIResponse
+            The response with ``status_code=200``.
+        """
+        return cls(200, response, message)
+
+    @classmethod
+    def status(cls, status_code):
+        """
+        Parameters
+        ----------
+        status_code: int
+
+        Returns
+        -------
+        APIResponse
+            A shared response which only carries ``status_code``
+            and its default message.
+
+        Notes
+        -----
+        The response is shared and mustn't be modified,
+        its ``response`` is read-only. Use ``copy_if_shared`` before editing it.
+        """
+        if (response := cls._POOL.get(status_code)) is None:
+            response = cls._POOL[status_code] = cls(status_code)
+            response.response = MappingProxyType({})
+        return response
+
+    def copy_if_shared(self):
         """
         Returns
         -------
-        int
+        APIResponse
+            A new response with the same status code if this one is shared
+            (``APIResponse.status``), otherwise this response itself.
         """
-        return self._status_code
+        if self._POOL.get(self.status_code) is self:
+            return self.__class__(self.status_code)
+        return self
 
-    @property
-    def response(self):
+    def to_json_bytes(self):
         """
         Returns
         -------
-        dict[str, str]
+        bytes
+            ``response`` together with ``message`` serialized as JSON.
         """
-        return self._response
+        if self.response:
+            return _dumps({**self.response, "message": self._message})
+        return _message_body(self._message)
 
     @property
     def message(self):
@@ -447,6 +582,39 @@ class APIResponse:
     def __repr__(self):
         return (
             f"<{self.__class__.__name__}: "
-            f"status_code={self._status_code!r} "
-            f"response={self._response!r}>"
+            f"status_code={self.status_code!r} "
+            f"response={self.response!r}>"
         )
+
+
+def _to_response(status_code, response=None, message=None):
+    """
+    Converts the return of a node into an ``APIResponse``.
+
+    Parameters
+    ----------
+    status_code: int, dict[str, str]
+    response: dict[str, str], str, optional
+    message: str, optional
+
+    Returns
+    -------
+    APIResponse
+
+    Notes
+    -----
+    The types of the parameters are checked, which means ``status_code`` can be
+    ``response`` and 'll be ``200`` and if ``response`` is the ``message``
+    it'll also be corrected.
+    This is because the project for which this library originally was coded
+    gets its data for this class by a return and if I want to send
+    ``status_code=201, message="Entry Created"`` I just can return
+    ``201, "Entry Created"`` and don't have to add an empty dictionary
+    to the return.
+    """
+    if isinstance(response, str):
+        message, response = response, None
+
+    if isinstance(status_code, dict):
+        return APIResponse.from_dict(status_code, message)
+    return APIResponse(status_code, response, message)
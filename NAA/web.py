@@ -1,11 +1,19 @@
+import asyncio
 import typing
 
+from functools import partial
+from werkzeug.datastructures import EnvironHeaders
+from werkzeug.http import HTTP_STATUS_CODES
 from werkzeug.serving import run_simple
-from werkzeug.wrappers import Request, Response
-from json import dumps
 from warnings import warn
 
-from .models import Node, APIRequest, APIResponse
+from .models import Node, APIRequest, APIResponse, HTTP_METHODS
+from .models import _append_check, _message_body  # noqa
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
 
 
 __all__ = (
@@ -15,35 +23,201 @@ __all__ = (
 )
 
 
-HTTP_METHODS = [
-    "GET",
-    "HEAD",
-    "POST",
-    "PUT",
-    "DELETE",
-    "CONNECT",
-    "OPTIONS",
-    "TRACE",
-    "PATCH",
-]
-
 ALLOWED_LIBS = {
     "AlbertUnruhUtils": "https://github.com/AlbertUnruh/AlbertUnruhUtils.py",
 }
 
 
+def _pre_dumps(status):
+    """
+    Parameters
+    ----------
+    status: int
+
+    Returns
+    -------
+    bytes
+        The body which is sent if a global request check fails.
+    """
+    return _message_body(APIResponse._TITLED_MESSAGES[status])  # noqa
+
+
+# the status lines and the header are the same for every WSGI response,
+# the reasons are upper-cased like werkzeug's ``Response`` does
+_STATUS_LINES = {
+    status: f"{status} {reason.upper()}" for status, reason in HTTP_STATUS_CODES.items()
+}  # type: dict[int, str]
+_CONTENT_TYPE = ("Content-Type", "application/json")
+
+
+def _wsgi_request(environ):
+    """
+    Parameters
+    ----------
+    environ: dict
+        The environment of a WSGI request.
+
+    Returns
+    -------
+    dict[str, typing.Any]
+        The keyword arguments for ``API._route``.
+
+    Notes
+    -----
+    The path is decoded like werkzeug's ``Request.path`` and the headers
+    are only read from ``environ`` when they're accessed.
+    """
+    path = environ.get("PATH_INFO") or ""
+    return {
+        "method": environ["REQUEST_METHOD"],
+        "path": "/" + path.encode("latin-1").decode(errors="replace").lstrip("/"),
+        "headers": EnvironHeaders(environ),
+        "ip": environ.get("REMOTE_ADDR"),
+    }
+
+
+def _wsgi_send(start_response, status, body, method):
+    """
+    Parameters
+    ----------
+    start_response: typing.Callable
+    status: int
+    body: bytes
+    method: str
+        The method of the request.
+
+    Returns
+    -------
+    typing.Iterable[bytes]
+        The iterable which is returned to the WSGI server.
+
+    Notes
+    -----
+    Like werkzeug's ``Response`` no body is sent for ``HEAD`` requests
+    and for statuses which mustn't have one (1xx, 204 and 304). Those
+    statuses also don't get a ``Content-Length`` and 304 no ``Content-Type``.
+    """
+    if (status_line := _STATUS_LINES.get(status)) is None:
+        status_line = f"{status} UNKNOWN"
+
+    if status < 200 or status == 204:
+        start_response(status_line, [_CONTENT_TYPE])
+        return ()
+    if status == 304:
+        start_response(status_line, [])
+        return ()
+
+    start_response(
+        status_line,
+        [_CONTENT_TYPE, ("Content-Length", str(len(body)))],
+    )
+    if method == "HEAD":
+        return ()
+    return [body]
+
+
+def _asgi_request(scope):
+    """
+    Parameters
+    ----------
+    scope: dict
+        The scope of an ASGI HTTP connection.
+
+    Returns
+    -------
+    dict[str, typing.Any]
+        The keyword arguments for ``API._route``.
+
+    Notes
+    -----
+    The request is built like ``_wsgi_request`` builds it from the environment
+    of werkzeug's server, so an endpoint sees the same path and headers
+    no matter which server is used.
+    """
+    # the headers are stored like a WSGI server stores them in its environment:
+    # names with underscores are dropped and repeated headers are joined
+    environ = {}
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1")
+        if "_" in name:
+            continue
+        key = name.upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = f"HTTP_{key}"
+            if key in environ:
+                value = f"{environ[key]},{value}"
+        environ[key] = value
+
+    return {
+        "method": scope["method"],
+        "path": "/" + scope["path"].lstrip("/"),
+        "headers": EnvironHeaders(environ),
+        "ip": (scope.get("client") or (None,))[0],
+    }
+
+
+async def _asgi_send(send, status, body):
+    """
+    Parameters
+    ----------
+    send: typing.Callable
+    status: int
+    body: bytes
+
+    Notes
+    -----
+    Statuses which mustn't have a body (1xx, 204 and 304) are sent without
+    one and without ``content-length``, like ``_wsgi_send`` does.
+    """
+    if status < 200 or status == 204:
+        headers = [(b"content-type", b"application/json")]
+        body = b""
+    elif status == 304:
+        headers = []
+        body = b""
+    else:
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
 def _default_endpoint(*_):
     return APIResponse(404, {"message": "No Path!"})
 
 
+class _VersionCtx:
+    __slots__ = ("root", "req_checks", "resp_checks")
+
+    def __init__(self, root, req_checks, resp_checks):
+        """
+        Everything a request needs from its version, resolved with one lookup.
+
+        Parameters
+        ----------
+        root: Node
+        req_checks: list[tuple[callable, int, bytes]]
+        resp_checks: list[callable]
+        """
+        self.root = root
+        self.req_checks = req_checks
+        self.resp_checks = resp_checks
+
+
 class API:
     _version_pattern = "v{version}"
     _version_default = None
     _current_version = None
+    _node_cls = Node
 
-    _checks_request_global: dict[str, list[tuple[callable, int]]]
+    _checks_request_global: dict[str, list[tuple[callable, int, bytes]]]
     _checks_response_global: dict[str, list[callable]]
     _versions: dict[str, Node]
+    _by_version: dict[str, _VersionCtx]
 
     def __init__(
         self,
@@ -77,6 +251,7 @@ class API:
         self._checks_request_global = {}
         self._checks_response_global = {}
         self._versions = {}
+        self._by_version = {}
         self._default_endpoint = _default_endpoint
 
         assert (
@@ -99,42 +274,80 @@ class API:
                 libs = ", ".join(used_libs[:-1]) + f" and {used_libs[-1]}"
                 warn(RuntimeWarning(f"Used Libraries {libs} must be used everywhere!"))
         self._used_libs = used_libs
+        self._uses_auu = "AlbertUnruhUtils" in used_libs
+
+    def _application(self, environ, start_response):
+        """
+        The API as WSGI application.
+
+        Parameters
+        ----------
+        environ: dict
+        start_response: typing.Callable
 
-    @Request.application
-    def _application(self, request):
+        Returns
+        -------
+        list[bytes]
         """
+        status, body = self._route(**_wsgi_request(environ))
+        return _wsgi_send(start_response, status, body, environ["REQUEST_METHOD"])
+
+    async def _asgi(self, scope, receive, send):
+        """
+        The API as ASGI application, it's served by ``run_api`` if uvicorn
+        is installed.
+
         Parameters
         ----------
-        request: Request
+        scope: dict
+        receive, send: typing.Callable
+
+        Notes
+        -----
+        The nodes and checks aren't coroutine functions and may block,
+        so every request is handled in a worker thread.
         """
-        path = request.path[1:]
+        if scope["type"] != "http":
+            return
 
-        version = self._version_default
-        p = path.split("/")
-        if p:
-            for v in self._versions:
-                if v == p[0]:
-                    version = v
-                    # to get rid of the version in path
-                    path = path[len(v) + 1 :]  # noqa: E203
-                    break
-        del p
+        status, body = await asyncio.to_thread(self._route, **_asgi_request(scope))
+        await _asgi_send(send, status, body)
+
+    def _route(self, method, path, headers, ip):
+        """
+        Parameters
+        ----------
+        method, path: str
+        headers: typing.Mapping[str, str]
+        ip: str, optional
+
+        Returns
+        -------
+        tuple[int, bytes]
+            The status code and the body of the response.
+        """
+        path = path[1:]
+
+        first, _, rest = path.partition("/")
+        if (ctx := self._by_version.get(first)) is not None:
+            version = first
+            # to get rid of the version in path
+            path = rest
+        else:
+            version = self._version_default
+            ctx = self._by_version[version]
 
         request = APIRequest(
-            method=request.method,
-            headers=dict(request.headers),
-            ip=request.remote_addr,
+            method=method,
+            headers=headers,
+            ip=ip,
             url=path,
             version=version,
         )
 
-        for check, status in self._checks_request_global.get(version):
+        for check, status, body in ctx.req_checks:
             if not check(request):
-                return Response(
-                    status=status,
-                    response=dumps({"message": APIResponse.DEFAULT_MESSAGES[status]}),
-                    content_type="application/json",
-                )
+                return status, body
 
         if not path:
             result = self._default_endpoint(request)
@@ -145,30 +358,24 @@ class API:
             # -----
             # - decorator is in this case nested and not direct accessible
             # - library: https://github.com/AlbertUnruh/AlbertUnruhUtils.py
-            if "AlbertUnruhUtils" in self._used_libs:
+            if self._uses_auu:
                 auu, result = result
                 if not auu[0]:
                     result = APIResponse(429)
-                result._response.update(auu[1])  # noqa
+                if auu[1]:
+                    result.response.update(auu[1])
 
         else:
-            path = path.split("/")
-            result = self._versions[version].find_node(
-                path=path, request=request
-            )  # type: APIResponse
+            result = ctx.root.find_node(path=path, request=request)  # type: APIResponse
 
-        for check in self._checks_response_global.get(version):
+        checks = ctx.resp_checks
+        if checks:
+            # the shared responses mustn't be modified by the checks
+            result = result.copy_if_shared()
+        for check in checks:
             check(result)
 
-        status = result.status_code
-
-        response = result.response
-        response.update(message=result.message)
-        response = dumps(response)
-
-        return Response(
-            status=status, response=response, content_type="application/json"
-        )
+        return result.status_code, result.to_json_bytes()
 
     def add_version(self, version, *, fallback: list[callable] = None):
         """
@@ -178,7 +385,7 @@ class API:
         fallback: list[callable]
         """
         for fb in fallback or []:
-            self.add_version(version)(fb)
+            self._register_version(version, fb)
 
         def decorator(clb):
             """
@@ -186,23 +393,7 @@ class API:
             ----------
             clb: callable
             """
-            self._current_version = self._version_pattern.format(version=version)
-
-            self._checks_request_global[
-                self._current_version
-            ] = self._checks_request_global.get(self._current_version, [])
-            self._checks_response_global[
-                self._current_version
-            ] = self._checks_response_global.get(self._current_version, [])
-
-            version_node = self._versions.get(
-                self._current_version, Node(*HTTP_METHODS, used_libs=self._used_libs)
-            )  # type: Node
-            node = Node(*HTTP_METHODS, used_libs=self._used_libs)(clb)
-            node._children.update(version_node._children)  # noqa
-            self._versions[self._current_version] = node
-            clb(self)
-            self._current_version = None
+            self._register_version(version, clb)
             return clb
 
         return decorator
@@ -228,13 +419,13 @@ class API:
                 The new node.
             """
             version = self._get_version()
-            node = Node(
+            node = self._node_cls(
                 *methods,
                 ignore_invalid_methods=ignore_invalid_methods,
                 used_libs=self._used_libs,
             )
             node(clb)
-            self._versions[version]._children[clb.__name__] = node  # noqa
+            self._versions[version]._add_child(clb.__name__, node)  # noqa
             return node
 
         return decorator
@@ -248,35 +439,19 @@ class API:
         ----------
         default_return_value: int
         """
-
-        def decorator(clb):
-            """
-            Parameters
-            ----------
-            clb: callable
-            """
-            version = self._get_version()
-            self._checks_request_global[version].append((clb, default_return_value))
-            return clb
-
-        return decorator
+        version = self._get_version()
+        return partial(
+            _append_check,
+            self._checks_request_global[version],
+            (default_return_value, _pre_dumps(default_return_value)),
+        )
 
     def add_global_response_check(self):
         """
         Can be used to edit responses before sending them.
         """
-
-        def decorator(clb):
-            """
-            Parameters
-            ----------
-            clb: callable
-            """
-            version = self._get_version()
-            self._checks_response_global[version].append(clb)
-            return clb
-
-        return decorator
+        version = self._get_version()
+        return partial(_append_check, self._checks_response_global[version], None)
 
     def default_endpoint(
         self,
@@ -315,7 +490,33 @@ class API:
         """
         return self._port
 
-    def run_api(self, *, debug=False, reload=False, processes=1):
+    @property
+    def wsgi(self):
+        """
+        The API as WSGI application, all endpoints and checks have to be
+        added before it's accessed.
+
+        Returns
+        -------
+        typing.Callable
+        """
+        self._finalize()
+        return self._application
+
+    @property
+    def asgi(self):
+        """
+        The API as ASGI application, all endpoints and checks have to be
+        added before it's accessed.
+
+        Returns
+        -------
+        typing.Callable
+        """
+        self._finalize()
+        return self._asgi
+
+    def run_api(self, *, debug=False, reload=False, processes=1, use_werkzeug=False):
         """
         Parameters
         ----------
@@ -323,12 +524,35 @@ class API:
             Whether it should debug/reload.
         processes: int
             The number of processes which can be used by the server.
+        use_werkzeug: bool
+            Whether werkzeug's development server should be used even
+            if uvicorn is installed.
+
+        Notes
+        -----
+        The API is served by uvicorn (ASGI) if it's installed. werkzeug's
+        ``run_simple`` (WSGI) is used instead if uvicorn isn't installed,
+        ``use_werkzeug`` is set or one of ``debug``, ``reload`` and
+        ``processes > 1`` is requested. ``run_simple`` handles the requests
+        in threads (or in ``processes`` processes).
+
+        werkzeug's server is only meant for development, in production
+        ``API.wsgi`` should be served by a WSGI server like gunicorn or waitress
+        or ``API.asgi`` by an ASGI server like uvicorn with several workers.
         """
-        if self._versions and (default := self._version_default) is not None:
-            if default not in self._versions:
-                raise RuntimeError(
-                    f"Can't have {default!r} as default version, because this version is not set!"
-                )
+        self._finalize()
+        if uvicorn is not None and not (
+            use_werkzeug or debug or reload or processes > 1
+        ):
+            uvicorn.run(
+                self._asgi,
+                host=self.host,
+                port=self.port,
+                interface="asgi3",
+                lifespan="off",
+            )
+            return
+
         run_simple(
             self.host,
             self.port,
@@ -336,10 +560,56 @@ class API:
             use_reloader=reload,
             use_debugger=debug,
             processes=processes,
+            threaded=processes == 1,
         )
 
     __call__ = run_api
 
+    def _finalize(self):
+        """
+        Called before the API is served, all endpoints and checks have to be
+        added by now.
+
+        Raises
+        ------
+        RuntimeError
+        """
+        if self._versions and (default := self._version_default) is not None:
+            if default not in self._versions:
+                raise RuntimeError(
+                    f"Can't have {default!r} as default version, because this version is not set!"
+                )
+        for ctx in self._by_version.values():
+            ctx.root.finalize()
+
+    def _register_version(self, version, clb):
+        """
+        Parameters
+        ----------
+        version: int
+        clb: callable
+            Adds the endpoints and checks to the version.
+
+        Notes
+        -----
+        The node and the checks of a version are only created once,
+        every further call (e.g. for a fallback) rebinds the node to ``clb``.
+        """
+        self._current_version = current = self._version_pattern.format(version=version)
+
+        if (ctx := self._by_version.get(current)) is None:
+            node = self._node_cls(*HTTP_METHODS, used_libs=self._used_libs)
+            ctx = self._by_version[current] = _VersionCtx(
+                node,
+                self._checks_request_global.setdefault(current, []),
+                self._checks_response_global.setdefault(current, []),
+            )
+            self._versions[current] = node
+        ctx.root(clb)
+
+        clb(self)
+        self._current_version = None
+
     def _get_version(self):
         """
         Returns
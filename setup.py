@@ -1,24 +1,29 @@
-from setuptools import setup
-import re
+from setuptools import Extension, setup
+import ast
+import os
 
 
 with open("NAA/__init__.py") as f:
-    file = f.read()
+    tree = ast.parse(f.read())
 
-version = re.search(
-    r"^__version__\s*=\s*[\'\"]([^\'\"]*)[\'\"]", file, re.MULTILINE
-).group(1)
-url = re.search(r"^__url__\s*=\s*[\'\"]([^\'\"]*)[\'\"]", file, re.MULTILINE).group(1)
-license = re.search(  # noqa
-    r"^__license__\s*=\s*[\'\"]([^\'\"]*)[\'\"]", file, re.MULTILINE
-).group(1)
-author = re.search(
-    r"^__author__\s*=\s*[\'\"]([^\'\"]*)[\'\"]", file, re.MULTILINE
-).group(1)
+# the metadata is assigned as plain string constants in NAA/__init__.py
+dunders = {
+    target.id: node.value.value
+    for node in tree.body
+    if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant)
+    for target in node.targets
+    if isinstance(target, ast.Name)
+}
+version = dunders["__version__"]
+url = dunders["__url__"]
+license = dunders["__license__"]  # noqa
+author = dunders["__author__"]
 
 
 with open("requirements.txt") as f:
-    requirements = f.readlines()
+    requirements = [
+        line for line in map(str.strip, f) if line and not line.startswith("#")
+    ]
 
 
 name = "NAA"
@@ -28,6 +33,28 @@ packages = [
 ]
 
 
+# optionally compiles the dispatch hot path (``API._application``, ``Node.run``,
+# ``Node.find_node``, ``APIResponse.__init__``) with Cython, needs Cython and
+# a C compiler:
+# NAA_CYTHONIZE=1 pip install --no-build-isolation .
+# (without ``--no-build-isolation`` Cython isn't available in the build environment)
+ext_modules = []
+if os.environ.get("NAA_CYTHONIZE"):
+    from Cython.Build import cythonize
+
+    ext_modules = cythonize(
+        [
+            Extension(
+                f"{name}.{module}",
+                [f"{name}/{module}.py"],
+                extra_compile_args=["-O3"] if os.name != "nt" else [],
+            )
+            for module in ("models", "web")
+        ],
+        compiler_directives={"language_level": "3"},
+    )
+
+
 setup(
     name=name,
     version=version,
@@ -36,4 +63,5 @@ setup(
     license=license,
     author=author,
     install_requires=requirements,
+    ext_modules=ext_modules,
 )